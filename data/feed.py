@@ -0,0 +1,133 @@
+from data.cli_info import AsyncOracleClient
+from models.api_models import Customer
+from utils.utils import sync_customers
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from datetime import date
+import pandas as pd
+import asyncio
+import logging
+import os
+import tempfile
+
+FEED_CHUNK_SIZE = int(os.getenv("FEED_CHUNK_SIZE", 5000))
+FEED_COLUMNS = ['CLIENT_B', 'BIRTHDAY', 'EX', 'R_E_MAILS', 'F_NAMES', 'SURNAME', 'PAN', 'R_MOB_PHONE']
+FEED_TEXT_COLUMNS = ['CLIENT_B', 'PAN', 'R_MOB_PHONE']
+
+def iter_frames(path: str, chunk_size: int = FEED_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    if path.lower().endswith(".csv"):
+        yield from pd.read_csv(path, dtype={column: str for column in FEED_TEXT_COLUMNS}, chunksize=chunk_size)
+        return
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+def _as_text(series: pd.Series) -> pd.Series:
+    return series.map(lambda value: None if pd.isna(value) else str(int(value)) if isinstance(value, float) else str(value))
+
+def _parse_dates(series: pd.Series, fmt: str) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    # Excel cells can mix real dates, text and blanks in one column; only the text needs the format.
+    is_date = series.map(lambda value: isinstance(value, date))
+    dates = pd.to_datetime(series[is_date])
+    texts = pd.to_datetime(series[~is_date].dropna().astype(str), format=fmt)
+    return pd.concat([dates, texts]).reindex(series.index)
+
+def prepare_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame[FEED_COLUMNS].copy()
+    for column in FEED_TEXT_COLUMNS:
+        frame[column] = _as_text(frame[column])
+
+    # Numeric EX cells lose their trailing zero (10.30 -> 10.3), so re-pad them before parsing as MM.YY.
+    expiry = frame['EX']
+    numeric_expiry = pd.to_numeric(expiry, errors='coerce')
+    expiry = expiry.astype(str).where(numeric_expiry.isna(), numeric_expiry.map("{:.2f}".format))
+
+    frame['date_birth'] = _parse_dates(frame['BIRTHDAY'], "%d.%m.%Y")
+    frame['date_expiry'] = pd.to_datetime(expiry, format="%m.%y") + pd.offsets.MonthEnd(0)
+    return frame.astype(object).where(frame.notna(), None)
+
+def build_customers(frame: pd.DataFrame, clients: Dict[str, Optional[Dict]]) -> List[Customer]:
+    customers = []
+    for item in frame.to_dict(orient='records'):
+        res_cli = clients.get(item['CLIENT_B'])
+        if not res_cli:
+            logging.warning(f"Cardholder `{item['CLIENT_B']}` not found in Oracle, skipping")
+            continue
+        customers.append(Customer(
+            additional_phone=None,
+            bank_manager_fio=None,
+            bank_manager_phone=None,
+            bank_product=None,
+            bin=419525,
+            card_type_id=4,
+            clid=item['CLIENT_B'],
+            date_birth=item['date_birth'],
+            date_expiry=item['date_expiry'],
+            email=item['R_E_MAILS'],
+            firstname=item['F_NAMES'],
+            inn=None,
+            language="ru",
+            lastname=item['SURNAME'],
+            manager=False,
+            manualSubscribe=False,
+            messageId=None,
+            middlename=res_cli['middle_name'],
+            pan=item['PAN'],
+            phone=item['R_MOB_PHONE'],
+            project_additional_data=[],
+            service_level="BASIC",
+            welcome="1",
+        ))
+    return customers
+
+async def iter_feed_customers(path: str, chunk_size: int = FEED_CHUNK_SIZE, client: Optional[AsyncOracleClient] = None) -> AsyncIterator[List[Customer]]:
+    owned = client is None
+    client = client or AsyncOracleClient()
+    frames = iter_frames(path, chunk_size)
+    try:
+        while True:
+            frame = await asyncio.to_thread(next, frames, None)
+            if frame is None:
+                return
+            frame = prepare_frame(frame)
+            clients = await client.clients_by_client_codes(frame['CLIENT_B'].tolist())
+            yield build_customers(frame, clients)
+    finally:
+        if owned:
+            client.close()
+
+async def sync_feed(path: str, chunk_size: int = FEED_CHUNK_SIZE):
+    return await sync_customers(iter_feed_customers(path, chunk_size))
+
+async def write_ndjson(path: str, target: str, chunk_size: int = FEED_CHUNK_SIZE) -> int:
+    count = 0
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(target)}.", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(target)))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            async for customers in iter_feed_customers(path, chunk_size):
+                lines = "".join(customer.model_dump_json() + "\n" for customer in customers)
+                await asyncio.to_thread(file.write, lines)
+                count += len(customers)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    logging.info(f"Wrote {count} customers from {path} to {target}")
+    return count
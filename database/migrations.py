@@ -0,0 +1,174 @@
+from database.mysql import database
+import asyncio
+import logging
+
+migrate_lock = asyncio.Lock()
+schema_current = False
+
+async def column_exists(table: str, column: str) -> bool:
+    query = """
+    SELECT COUNT(*) AS cnt FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """
+    result = await database.fetch_one(query, params=(table, column), as_dict=True)
+    return bool(result and result['cnt'])
+
+async def index_exists(table: str, index: str) -> bool:
+    query = """
+    SELECT COUNT(*) AS cnt FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """
+    result = await database.fetch_one(query, params=(table, index), as_dict=True)
+    return bool(result and result['cnt'])
+
+async def primary_key_columns(table: str):
+    query = """
+    SELECT COLUMN_NAME AS col FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = 'PRIMARY'
+    ORDER BY SEQ_IN_INDEX
+    """
+    rows = await database.fetch_all(query, params=(table,), as_dict=True)
+    return [row['col'] for row in rows]
+
+async def ensure_column(table: str, column: str, definition: str):
+    if not await column_exists(table, column):
+        await database.execute_query(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+async def ensure_index(table: str, index: str, definition: str):
+    if not await index_exists(table, index):
+        await database.execute_query(f"ALTER TABLE {table} ADD INDEX {index} {definition}")
+
+async def drop_index_if_exists(table: str, index: str):
+    if await index_exists(table, index):
+        await database.execute_query(f"ALTER TABLE {table} DROP INDEX {index}")
+
+async def create_base_tables():
+    await database.execute_query("""
+    CREATE TABLE IF NOT EXISTS tokens (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        login VARCHAR(255) NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        access_token TEXT,
+        refresh_token TEXT,
+        token_type VARCHAR(50),
+        expires_in INT,
+        refresh_expires_in INT
+    )
+    """)
+
+    await database.execute_query("""
+    CREATE TABLE IF NOT EXISTS customers (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        additional_phone VARCHAR(255) UNIQUE,
+        bank_manager_fio VARCHAR(255),
+        bank_manager_phone VARCHAR(255) UNIQUE,
+        bank_product VARCHAR(255),
+        bin VARCHAR(255),
+        card_type_id INT,
+        clid VARCHAR(255),
+        date_birth DATETIME,
+        date_expiry DATETIME,
+        email VARCHAR(255) UNIQUE,
+        firstname VARCHAR(255),
+        inn VARCHAR(255),
+        language VARCHAR(255),
+        lastname VARCHAR(255),
+        manager BOOLEAN,
+        manual_subscribe BOOLEAN,
+        message_id VARCHAR(255),
+        middlename VARCHAR(255),
+        pan VARCHAR(255),
+        phone VARCHAR(255) UNIQUE,
+        project_additional_data JSON,
+        service_level VARCHAR(255),
+        welcome VARCHAR(255)
+    )
+    """)
+    await ensure_column("customers", "fingerprint", "CHAR(64)")
+
+    await database.execute_query("""
+    CREATE TABLE IF NOT EXISTS sync_checkpoints (
+        feed VARCHAR(255) PRIMARY KEY,
+        file_hash CHAR(64),
+        file_mtime DOUBLE,
+        file_size BIGINT,
+        chunk_size INT,
+        last_chunk INT,
+        status VARCHAR(16),
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+    """)
+
+    await database.execute_query("""
+    CREATE TABLE IF NOT EXISTS customer_mirror (
+        phone VARCHAR(255) PRIMARY KEY,
+        upstream_id VARCHAR(64),
+        clid VARCHAR(255),
+        payload JSON NOT NULL,
+        synced_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_customer_mirror_upstream_id (upstream_id),
+        INDEX idx_customer_mirror_clid (clid)
+    )
+    """)
+
+async def drop_sparse_unique_indexes():
+    for index in ("email", "additional_phone", "bank_manager_phone"):
+        await drop_index_if_exists("customers", index)
+
+async def key_customers_by_phone():
+    if await primary_key_columns("customers") != ["phone"]:
+        result = await database.fetch_one("SELECT COUNT(*) AS cnt FROM customers WHERE phone IS NULL", as_dict=True)
+        if result and result['cnt']:
+            logging.warning(f"Removing {result['cnt']} customers without a phone before keying the table by phone")
+            await database.execute_query("DELETE FROM customers WHERE phone IS NULL")
+        await database.execute_query("""
+        ALTER TABLE customers
+            MODIFY id INT NOT NULL AUTO_INCREMENT,
+            MODIFY phone VARCHAR(64) NOT NULL,
+            DROP PRIMARY KEY,
+            ADD PRIMARY KEY (phone),
+            ADD UNIQUE INDEX uq_customers_id (id)
+        """)
+    await drop_index_if_exists("customers", "phone")
+    await ensure_index("customers", "idx_customers_clid", "(clid)")
+    await ensure_index("customers", "idx_customers_pan", "(pan)")
+    await ensure_column("customers", "updated_at", "TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
+
+async def track_checkpoint_failures():
+    await ensure_column("sync_checkpoints", "failed", "INT NOT NULL DEFAULT 0")
+
+MIGRATIONS = [
+    (1, "create base tables", create_base_tables),
+    (2, "drop unique indexes on sparse customer columns", drop_sparse_unique_indexes),
+    (3, "key customers by phone with clid/pan indexes and updated_at", key_customers_by_phone),
+    (4, "track failed customers in sync checkpoints", track_checkpoint_failures),
+]
+
+async def migrate():
+    global schema_current
+    async with migrate_lock:
+        if schema_current:
+            return
+        await database.execute_query("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        rows = await database.fetch_all("SELECT version FROM schema_migrations", as_dict=True)
+        applied = {row['version'] for row in rows}
+
+        for version, name, migration in MIGRATIONS:
+            if version in applied:
+                continue
+            logging.info(f"Applying migration {version}: {name}")
+            await migration()
+            await database.execute_query(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", params=(version, name)
+            )
+        schema_current = True
+
+async def ensure_schema():
+    if not schema_current:
+        await migrate()
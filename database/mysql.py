@@ -2,11 +2,24 @@ import aiomysql
 import asyncio
 import os
 from dotenv import load_dotenv
-from sshtunnel import SSHTunnelForwarder
+from database.tracing import tracer
+from database.tunnels import tunnel_manager
+from utils.metrics import MYSQL_POOL_ACQUIRE
+from contextlib import asynccontextmanager
+import time
 import logging
 
 load_dotenv()
 
+MYSQL_BULK_CHUNK_SIZE = int(os.getenv("MYSQL_BULK_CHUNK_SIZE", 1000))
+MYSQL_POOL_MINSIZE = int(os.getenv("MYSQL_POOL_MINSIZE", 1))
+MYSQL_POOL_MAXSIZE = int(os.getenv("MYSQL_POOL_MAXSIZE", 10))
+MYSQL_POOL_RECYCLE = int(os.getenv("MYSQL_POOL_RECYCLE", 3600))
+MYSQL_POOL_PREWARM = int(os.getenv("MYSQL_POOL_PREWARM", 0))
+MYSQL_CONNECT_TIMEOUT = float(os.getenv("MYSQL_CONNECT_TIMEOUT", 10))
+MYSQL_ACQUIRE_TIMEOUT = float(os.getenv("MYSQL_ACQUIRE_TIMEOUT", 10))
+MYSQL_HEALTH_TIMEOUT = float(os.getenv("MYSQL_HEALTH_TIMEOUT", 2))
+
 class MySQLDatabase:
     _instance = None
     _lock = asyncio.Lock()
@@ -21,9 +34,33 @@ class MySQLDatabase:
             self.initialized = True
             self.pool = None
             self.vidation_pool = None
-            self.ssh_tunnel = None
+            self.replica_pool = None
             self.use_ssh = False
 
+    async def create_pool(self, host, port, user, password, db):
+        pool = await aiomysql.create_pool(
+            host=host,
+            port=port,
+            user=user,
+            password=password,
+            db=db,
+            minsize=MYSQL_POOL_MINSIZE,
+            maxsize=MYSQL_POOL_MAXSIZE,
+            pool_recycle=MYSQL_POOL_RECYCLE,
+            connect_timeout=MYSQL_CONNECT_TIMEOUT,
+            autocommit=True
+        )
+        await self.prewarm(pool)
+        return pool
+
+    async def prewarm(self, pool, count=MYSQL_POOL_PREWARM):
+        count = min(count, pool.maxsize)
+        if count <= pool.size:
+            return
+        conns = await asyncio.gather(*(pool.acquire() for _ in range(count)))
+        for conn in conns:
+            pool.release(conn)
+
     async def connect(self):
         try:
             db_host = os.getenv("MYSQL_HOST")
@@ -38,61 +75,38 @@ class MySQLDatabase:
             vidation_db_password = os.getenv("MYSQL_PASSWORD_VIDATION_SERVICE")
             vidation_db_database = os.getenv("MYSQL_DB_VIDATION_SERVICE")
 
+            replica_host = os.getenv("MYSQL_REPLICA_HOST")
+            replica_port = int(os.getenv("MYSQL_REPLICA_PORT", db_port))
+
             use_ssh = os.getenv("USE_SSH") == "True"
             self.use_ssh = use_ssh
 
             if use_ssh:
-                ssh_host = os.getenv("SSH_HOST")
-                ssh_port = int(os.getenv("SSH_PORT", 22))
-                ssh_user = os.getenv("SSH_USER")
-                ssh_password = os.getenv("SSH_PASSWORD")
-
-                self.ssh_tunnel = SSHTunnelForwarder(
-                    (ssh_host, ssh_port),
-                    ssh_username=ssh_user,
-                    ssh_password=ssh_password,
-                    remote_bind_address=(db_host, db_port)
+                main_port, vidation_port = await asyncio.gather(
+                    tunnel_manager.open(db_host, db_port, on_restart=lambda: self.clear_pool("main")),
+                    tunnel_manager.open(vidation_db_host, vidation_db_port, on_restart=lambda: self.clear_pool("vidation")),
                 )
-                self.ssh_tunnel.start()
-                local_bind_port = self.ssh_tunnel.local_bind_port
-                print(f"SSH tunnel established successfully: {local_bind_port}")
-
-                self.pool = await aiomysql.create_pool(
-                    host='127.0.0.1',
-                    port=local_bind_port,
-                    user=db_user,
-                    password=db_password,
-                    db=db_database,
-                    autocommit=True
-                )
-
-                self.vidation_pool = await aiomysql.create_pool(
-                    host='127.0.0.1',
-                    port=local_bind_port,
-                    user=vidation_db_user,
-                    password=vidation_db_password,
-                    db=vidation_db_database,
-                    autocommit=True
-                )
-            else:
-                self.pool = await aiomysql.create_pool(
-                    host=db_host,
-                    port=db_port,
-                    user=db_user,
-                    password=db_password,
-                    db=db_database,
-                    autocommit=True
-                )
-
-                self.vidation_pool = await aiomysql.create_pool(
-                    host=vidation_db_host,
-                    port=vidation_db_port,
-                    user=vidation_db_user,
-                    password=vidation_db_password,
-                    db=vidation_db_database,
-                    autocommit=True
+                db_host, db_port = '127.0.0.1', main_port
+                vidation_db_host, vidation_db_port = '127.0.0.1', vidation_port
+                if replica_host:
+                    replica_port = await tunnel_manager.open(replica_host, replica_port, on_restart=lambda: self.clear_pool("replica"))
+                    replica_host = '127.0.0.1'
+
+            self.pool, self.vidation_pool = await asyncio.gather(
+                self.create_pool(db_host, db_port, db_user, db_password, db_database),
+                self.create_pool(vidation_db_host, vidation_db_port, vidation_db_user, vidation_db_password, vidation_db_database),
+            )
+
+            if replica_host:
+                self.replica_pool = await self.create_pool(
+                    replica_host,
+                    replica_port,
+                    os.getenv("MYSQL_REPLICA_USER", db_user),
+                    os.getenv("MYSQL_REPLICA_PASSWORD", db_password),
+                    os.getenv("MYSQL_REPLICA_DB", db_database),
                 )
-            logging.info("Success connecting to database")
+            logging.info(f"Success connecting to database (pool size {MYSQL_POOL_MINSIZE}-{MYSQL_POOL_MAXSIZE}, "
+                         f"replica={self.replica_pool is not None})")
         except Exception as e:
             logging.error(f"Error connecting to database: {e}")
             raise e
@@ -100,34 +114,135 @@ class MySQLDatabase:
     async def close(self):
         try:
             logging.info("Closing database connections...")
-            self.pool.close()
-            self.vidation_pool.close()
-            if self.use_ssh and self.ssh_tunnel:
-                self.ssh_tunnel.stop()
-            await self.pool.wait_closed()
-            await self.vidation_pool.wait_closed()
+            pools = list(self.pools().values())
+            for pool in pools:
+                pool.close()
+            for pool in pools:
+                await pool.wait_closed()
+            if self.use_ssh:
+                await tunnel_manager.close()
             logging.info("Database connections closed")
         except Exception as e:
             logging.error(f"Error closing database connections: {e}")
             raise e
 
-    async def execute_query(self, query, params=None, as_dict=False, use_vidation_db=False):
-        cursor_type = aiomysql.DictCursor if as_dict else aiomysql.Cursor
-        pool = self.vidation_pool if use_vidation_db else self.pool
+    def pools(self):
+        pools = {"main": self.pool, "vidation": self.vidation_pool, "replica": self.replica_pool}
+        return {name: pool for name, pool in pools.items() if pool is not None}
+
+    async def clear_pool(self, name):
+        pool = self.pools().get(name)
+        if pool is not None:
+            await pool.clear()
+
+    def select_pool(self, use_vidation_db=False, use_replica=False):
+        if use_vidation_db:
+            return "vidation", self.vidation_pool
+        if use_replica and self.replica_pool is not None:
+            return "replica", self.replica_pool
+        return "main", self.pool
+
+    def stats(self):
+        return {
+            name: {
+                "minsize": pool.minsize,
+                "maxsize": pool.maxsize,
+                "size": pool.size,
+                "free": pool.freesize,
+                "in_use": pool.size - pool.freesize,
+            }
+            for name, pool in self.pools().items()
+        }
+
+    async def ping(self, pool):
+        started = time.perf_counter()
+        conn = await asyncio.wait_for(pool.acquire(), MYSQL_HEALTH_TIMEOUT)
+        try:
+            async with conn.cursor() as cur:
+                await asyncio.wait_for(cur.execute("SELECT 1"), MYSQL_HEALTH_TIMEOUT)
+                await cur.fetchall()
+        finally:
+            pool.release(conn)
+        return (time.perf_counter() - started) * 1000
+
+    async def health(self):
+        pools = self.pools()
+        results = await asyncio.gather(*(self.ping(pool) for pool in pools.values()), return_exceptions=True)
+        stats = self.stats()
+        report = {}
+        for (name, pool), result in zip(pools.items(), results):
+            if isinstance(result, BaseException):
+                report[name] = {"status": "down", "error": repr(result), **stats[name]}
+            else:
+                report[name] = {"status": "up", "latency_ms": round(result, 2), **stats[name]}
+        healthy = bool(report) and all(pool["status"] == "up" for pool in report.values())
+        result = {"status": "ok" if healthy else "degraded", "pools": report}
+        if self.use_ssh:
+            result["tunnels"] = tunnel_manager.stats()
+        return result
+
+    @asynccontextmanager
+    async def acquire(self, use_vidation_db=False, use_replica=False):
+        pool_name, pool = self.select_pool(use_vidation_db, use_replica)
+        started = time.perf_counter()
+        try:
+            conn = await asyncio.wait_for(pool.acquire(), MYSQL_ACQUIRE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logging.error(f"Timed out after {MYSQL_ACQUIRE_TIMEOUT}s waiting for a {pool_name} pool connection "
+                          f"({pool.size - pool.freesize}/{pool.maxsize} in use)")
+            raise
+        MYSQL_POOL_ACQUIRE.labels(pool_name).observe(time.perf_counter() - started)
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
 
-        async with pool.acquire() as conn:
-            async with conn.cursor(cursor_type) as cur:
-                print("Executing SQL query:")
-                print("SQL:", cur.mogrify(query, params))
-                await cur.execute(query, params)
-                return await cur.fetchall()
+    async def execute_query(self, query, params=None, as_dict=False, use_vidation_db=False, use_replica=False):
+        cursor_type = aiomysql.DictCursor if as_dict else aiomysql.Cursor
+        pool_name, _ = self.select_pool(use_vidation_db, use_replica)
 
-    async def fetch_one(self, query, params=None, as_dict=False, use_vidation_db=False):
-        data = await self.execute_query(query, params, as_dict, use_vidation_db)
+        started = tracer.start()
+        try:
+            async with self.acquire(use_vidation_db, use_replica) as conn:
+                async with conn.cursor(cursor_type) as cur:
+                    await cur.execute(query, params)
+                    result = await cur.fetchall()
+        except Exception:
+            tracer.record(query, pool_name, started, error=True)
+            raise
+        tracer.record(query, pool_name, started, len(result))
+        return result
+
+    async def execute_many(self, query, params_seq, use_vidation_db=False, chunk_size=MYSQL_BULK_CHUNK_SIZE):
+        pool_name = "vidation" if use_vidation_db else "main"
+        params_seq = list(params_seq)
+        affected = 0
+
+        started = tracer.start()
+        try:
+            async with self.acquire(use_vidation_db) as conn:
+                async with conn.cursor() as cur:
+                    for i in range(0, len(params_seq), chunk_size):
+                        await conn.begin()
+                        try:
+                            await cur.executemany(query, params_seq[i:i + chunk_size])
+                            await conn.commit()
+                        except Exception:
+                            await conn.rollback()
+                            raise
+                        affected += cur.rowcount
+        except Exception:
+            tracer.record(query, pool_name, started, affected, error=True)
+            raise
+        tracer.record(query, pool_name, started, affected)
+        return affected
+
+    async def fetch_one(self, query, params=None, as_dict=False, use_vidation_db=False, use_replica=False):
+        data = await self.execute_query(query, params, as_dict, use_vidation_db, use_replica)
         return data[0] if data else None
 
-    async def fetch_all(self, query, params=None, as_dict=False, use_vidation_db=False):
-        data = await self.execute_query(query, params, as_dict, use_vidation_db)
+    async def fetch_all(self, query, params=None, as_dict=False, use_vidation_db=False, use_replica=False):
+        data = await self.execute_query(query, params, as_dict, use_vidation_db, use_replica)
         return data
 
 database = MySQLDatabase()
@@ -0,0 +1,85 @@
+from functools import lru_cache
+import logging
+import random
+import time
+import re
+import os
+
+DB_TRACE_ENABLED = os.getenv("DB_TRACE_ENABLED") == "True"
+DB_TRACE_SAMPLE_RATE = float(os.getenv("DB_TRACE_SAMPLE_RATE", 0.1))
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 500))
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:(?:%s|\?)\s*,\s*)+(?:%s|\?)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=512)
+def fingerprint(query):
+    query = _STRING_LITERAL.sub("?", query)
+    query = _NUMBER_LITERAL.sub("?", query)
+    query = _PLACEHOLDER_LIST.sub("(...)", query)
+    return _WHITESPACE.sub(" ", query).strip()
+
+class QueryStats:
+    __slots__ = ("count", "errors", "total_time", "max_time", "rows", "slow")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.slow = 0
+
+class QueryTracer:
+    def __init__(self, enabled=DB_TRACE_ENABLED, sample_rate=DB_TRACE_SAMPLE_RATE, slow_query_ms=DB_SLOW_QUERY_MS):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_query_ms = slow_query_ms
+        self.stats = {}
+
+    def start(self):
+        return time.perf_counter() if self.enabled else None
+
+    def record(self, query, pool_name, started, rows=0, error=False):
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        slow = duration * 1000 >= self.slow_query_ms
+        if not slow and not error and random.random() >= self.sample_rate:
+            return
+
+        statement = fingerprint(query)
+        stats = self.stats.get((pool_name, statement))
+        if stats is None:
+            stats = self.stats[(pool_name, statement)] = QueryStats()
+        stats.count += 1
+        stats.total_time += duration
+        stats.max_time = max(stats.max_time, duration)
+        stats.rows += rows or 0
+        if error:
+            stats.errors += 1
+        if slow:
+            stats.slow += 1
+            logging.warning(f"Slow query on {pool_name} pool ({duration * 1000:.1f} ms, {rows} rows): {statement}")
+
+    def snapshot(self):
+        return [
+            {
+                "pool": pool_name,
+                "statement": statement,
+                "count": stats.count,
+                "errors": stats.errors,
+                "slow": stats.slow,
+                "total_time": stats.total_time,
+                "max_time": stats.max_time,
+                "rows": stats.rows,
+            }
+            for (pool_name, statement), stats in self.stats.items()
+        ]
+
+    def reset(self):
+        self.stats = {}
+
+tracer = QueryTracer()
@@ -0,0 +1,143 @@
+from sshtunnel import SSHTunnelForwarder
+import asyncio
+import logging
+import os
+import time
+
+SSH_TUNNEL_CHECK_INTERVAL = float(os.getenv("SSH_TUNNEL_CHECK_INTERVAL", 30))
+SSH_TUNNEL_KEEPALIVE = float(os.getenv("SSH_TUNNEL_KEEPALIVE", 15))
+
+class Tunnel:
+    def __init__(self, remote_host, remote_port):
+        self.remote_host = remote_host
+        self.remote_port = remote_port
+        self.forwarder = None
+        self.local_port = None
+        self.up = False
+        self.latency_ms = None
+        self.restarts = 0
+        self.last_error = None
+        self.on_restart = []
+
+    def stats(self):
+        return {
+            "remote": f"{self.remote_host}:{self.remote_port}",
+            "local_port": self.local_port,
+            "up": self.up,
+            "latency_ms": round(self.latency_ms, 2) if self.latency_ms is not None else None,
+            "restarts": self.restarts,
+            "last_error": self.last_error,
+        }
+
+class TunnelManager:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, "initialized"):
+            self.initialized = True
+            self.tunnels = {}
+            self.locks = {}
+            self.monitor_task = None
+
+    def forwarder(self, tunnel):
+        return SSHTunnelForwarder(
+            (os.getenv("SSH_HOST"), int(os.getenv("SSH_PORT", 22))),
+            ssh_username=os.getenv("SSH_USER"),
+            ssh_password=os.getenv("SSH_PASSWORD"),
+            remote_bind_address=(tunnel.remote_host, tunnel.remote_port),
+            local_bind_address=('127.0.0.1', tunnel.local_port or 0),
+            set_keepalive=SSH_TUNNEL_KEEPALIVE,
+        )
+
+    async def start_forwarder(self, tunnel):
+        forwarder = self.forwarder(tunnel)
+        await asyncio.to_thread(forwarder.start)
+        tunnel.forwarder = forwarder
+        tunnel.local_port = forwarder.local_bind_port
+        tunnel.up = True
+        tunnel.last_error = None
+
+    async def open(self, host, port, on_restart=None):
+        key = (host, port)
+        async with self.locks.setdefault(key, asyncio.Lock()):
+            tunnel = self.tunnels.get(key)
+            if tunnel is None:
+                tunnel = Tunnel(host, port)
+                await self.start_forwarder(tunnel)
+                self.tunnels[key] = tunnel
+                logging.info(f"SSH tunnel to {host}:{port} established on local port {tunnel.local_port}")
+            if on_restart is not None:
+                tunnel.on_restart.append(on_restart)
+            if self.monitor_task is None:
+                self.monitor_task = asyncio.create_task(self.monitor())
+            return tunnel.local_port
+
+    async def check(self, tunnel):
+        forwarder = tunnel.forwarder
+        started = time.perf_counter()
+        if forwarder is not None and forwarder.is_active:
+            await asyncio.to_thread(forwarder.check_tunnels)
+            tunnel.up = forwarder.is_active and all(forwarder.tunnel_is_up.values())
+        else:
+            tunnel.up = False
+        if tunnel.up:
+            tunnel.latency_ms = (time.perf_counter() - started) * 1000
+            return
+        logging.warning(f"SSH tunnel to {tunnel.remote_host}:{tunnel.remote_port} is down, reconnecting")
+        await self.restart(tunnel)
+
+    async def restart(self, tunnel):
+        if tunnel.forwarder is not None:
+            try:
+                await asyncio.to_thread(tunnel.forwarder.stop, True)
+            except Exception as e:
+                logging.error(f"Error stopping SSH tunnel to {tunnel.remote_host}:{tunnel.remote_port}: {e}")
+            tunnel.forwarder = None
+        try:
+            await self.start_forwarder(tunnel)
+        except Exception as e:
+            tunnel.last_error = repr(e)
+            logging.error(f"Failed to reconnect SSH tunnel to {tunnel.remote_host}:{tunnel.remote_port}: {e}")
+            return
+        tunnel.restarts += 1
+        logging.info(f"SSH tunnel to {tunnel.remote_host}:{tunnel.remote_port} reconnected on local port {tunnel.local_port}")
+        for callback in tunnel.on_restart:
+            try:
+                await callback()
+            except Exception as e:
+                logging.error(f"SSH tunnel restart callback failed: {e}")
+
+    async def monitor(self):
+        while True:
+            await asyncio.sleep(SSH_TUNNEL_CHECK_INTERVAL)
+            for tunnel in list(self.tunnels.values()):
+                try:
+                    await self.check(tunnel)
+                except Exception as e:
+                    tunnel.last_error = repr(e)
+                    logging.error(f"SSH tunnel check for {tunnel.remote_host}:{tunnel.remote_port} failed: {e}")
+
+    async def close(self):
+        if self.monitor_task is not None:
+            self.monitor_task.cancel()
+            try:
+                await self.monitor_task
+            except asyncio.CancelledError:
+                pass
+            self.monitor_task = None
+        for tunnel in self.tunnels.values():
+            if tunnel.forwarder is not None:
+                await asyncio.to_thread(tunnel.forwarder.stop)
+                tunnel.forwarder = None
+            tunnel.up = False
+        self.tunnels = {}
+
+    def stats(self):
+        return [tunnel.stats() for tunnel in self.tunnels.values()]
+
+tunnel_manager = TunnelManager()
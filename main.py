@@ -1,17 +1,31 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import auth_controller, customers_controller
+from routers import auth_controller, customers_controller, reference_controller, metrics_controller, health_controller
+from data.cli_info import OracleClient
 from database.mysql import database
-from utils.utils import create_table_if_not_exists, load_customers_from_file, process_customers
+from utils.http_client import http_client
+from utils.token_manager import token_manager
+from utils.utils import create_table_if_not_exists
+from utils.checkpoint import sync_file_with_checkpoint
+from utils.startup import startup_tracker
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 import logging
 import asyncio
+import os
+
+TOKEN_CHECK_INTERVAL = int(os.getenv("TOKEN_CHECK_INTERVAL", 60))
+CUSTOMERS_FEED = os.getenv("CUSTOMERS_FEED", "./data/new_data.json")
+ORACLE_CACHE_WARMUP = os.getenv("ORACLE_CACHE_WARMUP") == "True"
 
 app = FastAPI()
 
 app.include_router(auth_controller.router)
 app.include_router(customers_controller.router)
+app.include_router(reference_controller.router)
+app.include_router(metrics_controller.router)
+app.include_router(health_controller.router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,25 +38,53 @@ app.add_middleware(
 scheduler = AsyncIOScheduler()
 
 async def update_tokens():
-    await auth_controller.update_token()
+    await token_manager.get_access_token()
 
 async def load_data():
-    customers = await load_customers_from_file('./data/new_data.json')
-    await process_customers(customers)
+    await sync_file_with_checkpoint(CUSTOMERS_FEED)
 
 async def check_and_update_customers():
     await load_data()
 
+async def connect_database():
+    if database.pool is None:
+        await database.connect()
+    await create_table_if_not_exists()
+
+async def persist_token():
+    token = token_manager.token
+    if token is not None:
+        await auth_controller.persist_token(token)
+
+async def start_database_jobs():
+    if startup_tracker.done("token"):
+        await startup_tracker.run("token_persist", persist_token())
+    startup_tracker.background("initial_sync", check_and_update_customers())
+
+async def persist_recovered_token():
+    if startup_tracker.done("database"):
+        await startup_tracker.run("token_persist", persist_token())
+
 @app.on_event("startup")
 async def startup():
     try:
-        await database.connect()
-        await create_table_if_not_exists()
-        await auth_controller.get_token()
+        await startup_tracker.run("http", http_client.start())
+        startup_tracker.on_recover("token", persist_recovered_token)
+
+        await asyncio.gather(
+            startup_tracker.run("database", connect_database()),
+            startup_tracker.run("token", auth_controller.fetch_token()),
+        )
+
+        if ORACLE_CACHE_WARMUP:
+            startup_tracker.background("oracle_warmup", asyncio.to_thread(OracleClient().warm_up))
 
-        await check_and_update_customers()
+        if startup_tracker.done("database"):
+            await start_database_jobs()
+        else:
+            startup_tracker.retry("database", connect_database, then=start_database_jobs)
 
-        scheduler.add_job(update_tokens, CronTrigger(day="*/25"))
+        scheduler.add_job(update_tokens, IntervalTrigger(seconds=TOKEN_CHECK_INTERVAL))
         scheduler.add_job(check_and_update_customers, CronTrigger(day="*/1"))
         scheduler.start()
     except Exception as e:
@@ -51,6 +93,10 @@ async def startup():
 @app.on_event("shutdown")
 async def shutdown():
     try:
+        await startup_tracker.cancel_background()
+        if scheduler.running:
+            scheduler.shutdown(wait=False)
+        await http_client.close()
         await database.close()
     except Exception as e:
         logging.error(f"Error during shutdown: {e}") 
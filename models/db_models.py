@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, TIMESTAMP, func
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -16,29 +16,31 @@ class Token(Base):
     refresh_expires_in = Column(Integer)
 
 class Customer(Base):
-    __tablename__ = "infinite_customers"
+    __tablename__ = "customers"
 
-    id = Column(Integer, primary_key=True, index=True)
-    additional_phone = Column(String, unique=True, index=True)
-    bank_manager_fio = Column(String, index=True)
-    bank_manager_phone = Column(String, unique=True, index=True)
-    bank_product = Column(String)
-    bin = Column(Integer)
+    phone = Column(String(64), primary_key=True)
+    id = Column(Integer, unique=True, autoincrement=True, nullable=False)
+    additional_phone = Column(String(255))
+    bank_manager_fio = Column(String(255))
+    bank_manager_phone = Column(String(255))
+    bank_product = Column(String(255))
+    bin = Column(String(255))
     card_type_id = Column(Integer)
-    clid = Column(String)
+    clid = Column(String(255), index=True)
     date_birth = Column(DateTime)
     date_expiry = Column(DateTime)
-    email = Column(String, unique=True, index=True)
-    firstname = Column(String, index=True)
-    inn = Column(String)
-    language = Column(String)
-    lastname = Column(String, index=True)
+    email = Column(String(255))
+    firstname = Column(String(255))
+    inn = Column(String(255))
+    language = Column(String(255))
+    lastname = Column(String(255))
     manager = Column(Boolean)
-    manualSubscribe = Column(Boolean)
-    messageId = Column(String)
-    middlename = Column(String)
-    pan = Column(String)
-    phone = Column(String, unique=True, index=True)
+    manualSubscribe = Column("manual_subscribe", Boolean)
+    messageId = Column("message_id", String(255))
+    middlename = Column(String(255))
+    pan = Column(String(255), index=True)
     project_additional_data = Column(JSON)
-    service_level = Column(String)
-    welcome = Column(String)
+    service_level = Column(String(255))
+    welcome = Column(String(255))
+    fingerprint = Column(String(64))
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
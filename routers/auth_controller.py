@@ -3,7 +3,8 @@ from models.api_models import Token
 from utils.utils import get_token_from_db, save_token_to_db, update_token_in_db
 from database.mysql import database
 from utils.logger import ModuleLogger
-import httpx
+from utils.http_client import http_client
+from utils.token_manager import token_manager
 import os
 
 API_URL = os.getenv("API_URL")
@@ -17,23 +18,19 @@ router = APIRouter(
 
 logger = ModuleLogger("auth").get_logger()
 
-@router.post("/getToken", response_model=Token)
-async def get_token():
+async def fetch_token():
     url = f"{API_URL}/api/oauth/getToken"
-    headers = {"Content-Type": "application/json"}
     data = {"username": LOGIN, "password": PASSWORD}
 
-    logger.info(f"Request: URL: {url}, Headers: {headers},  Data: {data}")
+    logger.info(f"Requesting token for {LOGIN}")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=data)
-        
-    logger.info(f"Response: Status Code: {response.status_code}, Headers: {response.headers}, Body: {response.json()}")
+    response = await http_client.post("getToken", url, json=data)
 
     if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=f"Failed to get token: {response.json()}")
+        raise HTTPException(status_code=response.status_code, detail=f"Failed to get token: {response.text}")
 
     token_data = response.json()
+
     token = Token(
         login=LOGIN,
         password=PASSWORD,
@@ -44,38 +41,57 @@ async def get_token():
         refresh_expires_in=token_data['refresh_expires_in'],
     )
 
+    token_manager.store(token)
+    return token
+
+async def persist_token(token: Token):
     check = await get_token_from_db()
     if check:
         await update_token_in_db(token)
-        return token
+        return
 
     await save_token_to_db(token)
-    return token
 
-@router.post("/updateToken", response_model=Token)
-async def update_token():
-    token = await get_token_from_db()
+@router.post("/getToken", response_model=Token)
+async def get_token():
+    token = await fetch_token()
+    await persist_token(token)
+    return token
 
+async def renew_token(refresh_token: str, login: str = LOGIN, password: str = PASSWORD):
     url = f"{API_URL}/api/oauth/refreshToken"
-    headers = {"Content-Type": "application/json"}
-    data = {"refresh_token": token.refresh_token}
+    data = {"refresh_token": refresh_token}
     
-    logger.info(f"Request: URL: {url}, Headers: {headers},  Data: {data}")
+    logger.info(f"Refreshing token for {login}")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=data)
-
-    logger.info(f"Response: Status Code: {response.status_code}, Headers: {response.headers}, Body: {response.json()}")
+    response = await http_client.post("refreshToken", url, json=data)
 
     if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=f"Failed to update token {response.json()}")
-    
+        raise HTTPException(status_code=response.status_code, detail=f"Failed to update token: {response.text}")
+
     token_data = response.json()
-    token.access_token = token_data['access_token']
-    token.refresh_token = token_data['refresh_token']
-    token.token_type = token_data['token_type']
-    token.expires_in = token_data['expires_in']
-    token.refresh_expires_in = token_data['refresh_expires_in']
-    
+
+    token = Token(
+        login=login,
+        password=password,
+        access_token=token_data['access_token'],
+        refresh_token=token_data['refresh_token'],
+        token_type=token_data['token_type'],
+        expires_in=token_data['expires_in'],
+        refresh_expires_in=token_data['refresh_expires_in'],
+    )
+    token_manager.store(token)
+    return token
+
+@router.post("/updateToken", response_model=Token)
+async def update_token():
+    if token_manager.refresh_token is not None:
+        token = await renew_token(token_manager.refresh_token)
+    else:
+        stored = await get_token_from_db()
+        if not stored:
+            raise HTTPException(status_code=404, detail="Token not found")
+        token = await renew_token(stored['refresh_token'], stored['login'], stored['password'])
+
     await update_token_in_db(token)
     return token
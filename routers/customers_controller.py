@@ -1,13 +1,18 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from models.api_models import Customer, CustomerClose
 from typing import Optional, List
-from utils.utils import get_authorization_header
 from utils.logger import ModuleLogger
+from utils.token_manager import authorized_request
+from utils.mirror import USE_LOCAL_MIRROR, mirror_lookup, mirror_store, phone_by_clid, write_through
 from fastapi.encoders import jsonable_encoder
-import httpx
+import json
 import os
 
 API_URL = os.getenv("API_URL")
+USER_LIST_PAGE_SIZE = int(os.getenv("USER_LIST_PAGE_SIZE", 500))
+USER_LIST_MAX_PAGE_SIZE = int(os.getenv("USER_LIST_MAX_PAGE_SIZE", 5000))
 
 router = APIRouter(
     prefix="/api/user",
@@ -16,46 +21,66 @@ router = APIRouter(
 
 logger = ModuleLogger("customers").get_logger()
 
+def upstream_error(response, message):
+    headers = {"Retry-After": response.headers["Retry-After"]} if "Retry-After" in response.headers else None
+    return HTTPException(status_code=response.status_code, detail=f"{message}: {response.text}", headers=headers)
+
 @router.post("/add", response_model=dict)
 async def add_customers(customers: List[Customer]):
     url = f"{API_URL}/api/user/add"
-    headers = await get_authorization_header()
     data = {"users": [jsonable_encoder(customer) for customer in customers]}
 
-    logger.info(f"Request to add customers: URL: {url}, Headers: {headers}, Data: {data}")
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=data, headers=headers)
+    logger.info(f"Request to add {len(customers)} customers")
     
-    logger.info(f"Response from add customers: Status Code: {response.status_code}, Headers: {response.headers}, Body: {response.json()}")
+    response = await authorized_request("user/add", "POST", url, json=data)
     
     if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=f"Failed to add customers: {response.json()}")
-    
-    return response.json()
+        raise upstream_error(response, "Failed to add customers")
+
+    body = response.json()
+    await write_through("add", customers)
+    return body
 
 @router.post("/close", response_model=dict)
 async def close_customers(customers: List[CustomerClose]):
     url = "https://api.infocus.company/api/user/close"
-    headers = await get_authorization_header()
     data = {"users": [jsonable_encoder(customer) for customer in customers]}
 
-    logger.info(f"Request to close customers: URL: {url}, Headers: {headers}, Data: {data}")
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=data, headers=headers)
+    logger.info(f"Request to close {len(customers)} customers")
 
-    logger.info(f"Response from close customers: Status Code: {response.status_code}, Headers: {response.headers}, Body: {response.json()}")
+    response = await authorized_request("user/close", "POST", url, json=data)
 
     if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=f"Failed to close customers {response.json()}")
-    
-    return response.json()
+        raise upstream_error(response, "Failed to close customers")
+
+    body = response.json()
+    await write_through("close", customers)
+    return body
+
+async def relay(response):
+    async for chunk in response.aiter_bytes():
+        yield chunk
 
 @router.get("/list", response_model=List[dict])
-async def get_customers(from_record: Optional[str] = None, id: Optional[str] = None, limit: Optional[str] = None, phone: Optional[str] = None):
+async def get_customers(from_record: Optional[str] = None, id: Optional[str] = None, limit: Optional[str] = None, phone: Optional[str] = None,
+                        clid: Optional[str] = None, stream: bool = False):
     url = "https://api.infocus.company/api/user/list"
-    headers = await get_authorization_header()
+
+    if clid is not None:
+        phone = await phone_by_clid(clid)
+        if phone is None:
+            raise HTTPException(status_code=404, detail=f"Customer with clid {clid} not found")
+
+    lookup = USE_LOCAL_MIRROR and not stream and from_record is None and limit is None and (phone is not None or id is not None)
+    if lookup:
+        try:
+            records = await mirror_lookup(phone=phone, id=id)
+        except Exception as e:
+            logger.error(f"Local mirror lookup failed, falling back to upstream: {e}")
+            records = None
+        if records is not None:
+            logger.info(f"Served {len(records)} customers from local mirror")
+            return records
 
     params = {
         "from": from_record,
@@ -65,34 +90,80 @@ async def get_customers(from_record: Optional[str] = None, id: Optional[str] = N
     }
     params = {k: v for k, v in params.items() if v is not None}
 
-    logger.info(f"Request to get customers: URL: {url}, Headers: {headers}, Params: {params}")
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
+    logger.info(f"Request to get customers: {sorted(params)}")
 
-    logger.info(f"Response from get customers: Status Code: {response.status_code}, Headers: {response.headers}, Body: {response.json()}")
+    if stream:
+        response = await authorized_request("user/list", "GET", url, params=params, stream=True)
+        if response.status_code != 200:
+            await response.aread()
+            await response.aclose()
+            raise HTTPException(status_code=response.status_code, detail=f"Failed to get customer list: {response.text}")
+        return StreamingResponse(
+            relay(response),
+            media_type=response.headers.get("content-type", "application/json"),
+            background=BackgroundTask(response.aclose),
+        )
+
+    response = await authorized_request("user/list", "GET", url, params=params)
 
     if response.status_code != 200:
-        logger.error(f"Error response from API: {response.text}")
         raise HTTPException(status_code=response.status_code, detail=f"Failed to get customer list: {response.text}")
-    
+
+    body = response.json()
+    if lookup:
+        try:
+            await mirror_store(body)
+        except Exception as e:
+            logger.error(f"Failed to store customers in local mirror: {e}")
+    return body
+
+async def fetch_customer_page(url, offset, page_size):
+    params = {"from": str(offset), "limit": str(page_size)}
+    response = await authorized_request("user/list", "GET", url, params=params)
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code,
+                            detail=f"Failed to get customer list page from={offset}: {response.text}")
     return response.json()
 
+async def iter_customer_pages(url, page, page_size, offset=0):
+    while True:
+        for record in page:
+            yield (json.dumps(record, ensure_ascii=False) + "\n").encode()
+        offset += len(page)
+        if len(page) < page_size:
+            logger.info(f"Streamed {offset} customers")
+            return
+        try:
+            page = await fetch_customer_page(url, offset, page_size)
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else repr(e)
+            logger.error(f"Customer list stream aborted at from={offset}: {detail}")
+            yield (json.dumps({"error": detail, "from": offset}, ensure_ascii=False) + "\n").encode()
+            return
+
+@router.get("/list/all")
+async def get_all_customers(from_record: int = Query(0, ge=0),
+                            page_size: int = Query(USER_LIST_PAGE_SIZE, ge=1, le=USER_LIST_MAX_PAGE_SIZE)):
+    url = "https://api.infocus.company/api/user/list"
+
+    logger.info(f"Request to stream all customers from {from_record} in pages of {page_size}")
+
+    page = await fetch_customer_page(url, from_record, page_size)
+    return StreamingResponse(iter_customer_pages(url, page, page_size, from_record), media_type="application/x-ndjson")
+
 
 @router.post("/update", response_model=dict)
 async def update_customers(customers: List[Customer]):
     url = "https://api.infocus.company/api/user/update"
-    headers = await get_authorization_header()
     data = {"users": [jsonable_encoder(customer) for customer in customers]}
 
-    logger.info(f"Request to update customers: URL: {url}, Headers: {headers}, Data: {data}")
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=data, headers=headers)
+    logger.info(f"Request to update {len(customers)} customers")
 
-    logger.info(f"Response from update customers: Status Code: {response.status_code}, Headers: {response.headers}, Body: {response.json()}")
+    response = await authorized_request("user/update", "POST", url, json=data)
 
     if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=f"Failed to update customers {response.json()}")
-    
-    return response.json()
+        raise upstream_error(response, "Failed to update customers")
+
+    body = response.json()
+    await write_through("update", customers)
+    return body
@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from database.mysql import database
+from utils.startup import startup_tracker
+
+router = APIRouter(
+    prefix="/api/health",
+    tags=["health"],
+)
+
+@router.get("/live", response_model=dict)
+async def get_liveness():
+    return {"status": "ok", **startup_tracker.report()}
+
+@router.get("/ready", response_model=dict)
+async def get_readiness():
+    report = startup_tracker.report()
+    return JSONResponse({"status": "ok" if report["ready"] else "starting", **report},
+                        status_code=200 if report["ready"] else 503)
+
+@router.get("/db", response_model=dict)
+async def get_db_health():
+    report = await database.health()
+    return JSONResponse(report, status_code=200 if report["status"] == "ok" else 503)
+
+@router.get("/db/stats", response_model=dict)
+async def get_db_stats():
+    return database.stats()
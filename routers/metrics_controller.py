@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+import utils.metrics
+
+router = APIRouter(
+    tags=["metrics"],
+)
+
+@router.get("/metrics")
+async def get_metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
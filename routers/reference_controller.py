@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException
+from data.cli_info import OracleClient
+from utils.logger import ModuleLogger
+
+router = APIRouter(
+    prefix="/api/reference",
+    tags=["reference"],
+)
+
+logger = ModuleLogger("reference").get_logger()
+
+@router.post("/invalidate", response_model=dict)
+async def invalidate_reference_cache(scope: str = "reference"):
+    if scope not in ("reference", "lookups", "all"):
+        raise HTTPException(status_code=400, detail=f"Unknown cache scope: {scope}")
+    client = OracleClient()
+    if scope in ("reference", "all"):
+        client.invalidate_reference_cache()
+    if scope in ("lookups", "all"):
+        client.invalidate_lookup_cache()
+    logger.info(f"Oracle cache invalidated: {scope}")
+    return {"status": "ok", "scope": scope}
+
+@router.get("/stats", response_model=dict)
+async def get_cache_stats():
+    return OracleClient().cache_stats()
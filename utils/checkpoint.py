@@ -0,0 +1,82 @@
+from database.mysql import database
+from utils.utils import iter_customers_from_file, sync_customers, SYNC_CHUNK_SIZE
+from typing import Dict, Optional
+import asyncio
+import hashlib
+import logging
+import os
+
+CHECKPOINT_READ_SIZE = 1024 * 1024
+
+sync_lock = asyncio.Lock()
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(CHECKPOINT_READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+async def get_checkpoint(feed: str) -> Optional[Dict]:
+    query = "SELECT * FROM sync_checkpoints WHERE feed = %s"
+    return await database.fetch_one(query, params=(feed,), as_dict=True)
+
+async def save_checkpoint(feed: str, file_hash: str, file_mtime: float, file_size: int, chunk_size: int,
+                          last_chunk: int, status: str, failed: int = 0):
+    query = """
+    INSERT INTO sync_checkpoints (feed, file_hash, file_mtime, file_size, chunk_size, last_chunk, status, failed)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE file_hash = VALUES(file_hash), file_mtime = VALUES(file_mtime),
+                            file_size = VALUES(file_size), chunk_size = VALUES(chunk_size),
+                            last_chunk = VALUES(last_chunk), status = VALUES(status), failed = VALUES(failed)
+    """
+    params = (feed, file_hash, file_mtime, file_size, chunk_size, last_chunk, status, failed)
+    await database.execute_query(query, params)
+
+async def sync_file_with_checkpoint(path: str, chunk_size: int = SYNC_CHUNK_SIZE) -> Optional[Dict[str, int]]:
+    # Startup, the cron job and a database recovery can all start a sync; two runs would race on one checkpoint.
+    if sync_lock.locked():
+        logging.info(f"A sync is already running, skipping {path}")
+        return None
+    async with sync_lock:
+        return await _sync_file(path, chunk_size)
+
+async def _sync_file(path: str, chunk_size: int) -> Optional[Dict[str, int]]:
+    feed = os.path.abspath(path)
+    stat = os.stat(path)
+    checkpoint = await get_checkpoint(feed)
+
+    if (checkpoint and checkpoint['status'] == "done" and checkpoint['file_mtime'] == stat.st_mtime
+            and checkpoint['file_size'] == stat.st_size):
+        logging.info(f"Feed {path} is unchanged since the last sync, skipping")
+        return None
+
+    file_hash = await asyncio.to_thread(_hash_file, path)
+    same_file = checkpoint is not None and checkpoint['file_hash'] == file_hash
+    if same_file and checkpoint['status'] == "done":
+        await save_checkpoint(feed, file_hash, stat.st_mtime, stat.st_size, checkpoint['chunk_size'],
+                              checkpoint['last_chunk'], "done")
+        logging.info(f"Feed {path} content is unchanged since the last sync, skipping")
+        return None
+
+    start_chunk = 0
+    failed = 0
+    if same_file and checkpoint['status'] == "running" and checkpoint['chunk_size'] == chunk_size:
+        start_chunk = checkpoint['last_chunk'] + 1
+        failed = checkpoint['failed'] or 0
+        logging.info(f"Resuming sync of {path} from chunk {start_chunk} ({failed} failed before the restart)")
+
+    await save_checkpoint(feed, file_hash, stat.st_mtime, stat.st_size, chunk_size, start_chunk - 1, "running", failed)
+
+    async def on_chunk(index, result):
+        nonlocal failed
+        failed += result['failed']
+        await save_checkpoint(feed, file_hash, stat.st_mtime, stat.st_size, chunk_size, index, "running", failed)
+
+    totals = await sync_customers(iter_customers_from_file(path, chunk_size), start_chunk=start_chunk, on_chunk=on_chunk)
+
+    # Failures from before a resume are carried in the checkpoint, so a "partial" feed is replayed in
+    # full next time; fingerprints keep the already-synced customers cheap.
+    status = "done" if failed == 0 else "partial"
+    await save_checkpoint(feed, file_hash, stat.st_mtime, stat.st_size, chunk_size, -1, status, failed)
+    return totals
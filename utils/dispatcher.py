@@ -0,0 +1,127 @@
+from fastapi import HTTPException
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional
+import asyncio
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import logging
+import random
+import time
+import httpx
+import os
+
+SYNC_CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY", 4))
+SYNC_RATE_LIMIT = float(os.getenv("SYNC_RATE_LIMIT", 5))
+SYNC_RATE_BURST = int(os.getenv("SYNC_RATE_BURST", SYNC_CONCURRENCY))
+SYNC_MAX_RETRIES = int(os.getenv("SYNC_MAX_RETRIES", 3))
+SYNC_BACKOFF_BASE = float(os.getenv("SYNC_BACKOFF_BASE", 0.5))
+SYNC_BACKOFF_MAX = float(os.getenv("SYNC_BACKOFF_MAX", 30))
+SYNC_RETRY_AFTER_MAX = float(os.getenv("SYNC_RETRY_AFTER_MAX", 300))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Only errors raised before the request reached upstream; a read timeout on /user/add may already have been applied.
+RETRY_TRANSPORT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+class RateLimiter:
+    def __init__(self, rate: float = SYNC_RATE_LIMIT, burst: int = SYNC_RATE_BURST):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+@dataclass
+class ChunkResult:
+    index: int
+    items: List[Any]
+    ok: bool
+    attempts: int
+    response: Any = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+
+@dataclass
+class DispatchReport:
+    name: str
+    results: List[ChunkResult] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> List[Any]:
+        return [item for result in self.results if result.ok for item in result.items]
+
+    @property
+    def failed(self) -> List[ChunkResult]:
+        return [result for result in self.results if not result.ok]
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, HTTPException):
+        return error.status_code in RETRY_STATUS_CODES
+    return isinstance(error, RETRY_TRANSPORT_ERRORS)
+
+def retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(error, "headers", None) or {}
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), SYNC_RETRY_AFTER_MAX)
+
+class BatchDispatcher:
+    def __init__(self, concurrency: int = SYNC_CONCURRENCY, rate_limiter: Optional[RateLimiter] = None,
+                 max_retries: int = SYNC_MAX_RETRIES):
+        self.concurrency = max(concurrency, 1)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(SYNC_BACKOFF_MAX, SYNC_BACKOFF_BASE * 2 ** (attempt - 1)))
+
+    async def _send_chunk(self, name: str, send: Callable[[List[Any]], Awaitable[Any]], index: int, items: List[Any]) -> ChunkResult:
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                attempt += 1
+                await self.rate_limiter.acquire()
+                try:
+                    response = await send(items)
+                    return ChunkResult(index=index, items=items, ok=True, attempts=attempt, response=response)
+                except Exception as e:
+                    status_code = getattr(e, "status_code", None)
+                    if not is_retryable(e) or attempt > self.max_retries:
+                        logging.error(f"{name}: chunk {index} of {len(items)} items failed after {attempt} attempts: {e}")
+                        return ChunkResult(index=index, items=items, ok=False, attempts=attempt, error=str(e), status_code=status_code)
+                    delay = self.backoff(attempt)
+                    server_delay = retry_after(e)
+                    if server_delay is not None:
+                        delay = max(delay, server_delay)
+                    logging.warning(f"{name}: chunk {index} attempt {attempt} failed ({e}), retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+
+    async def dispatch(self, name: str, send: Callable[[List[Any]], Awaitable[Any]], items: List[Any], batch_size: int) -> DispatchReport:
+        chunks = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        results = await asyncio.gather(*(self._send_chunk(name, send, index, chunk) for index, chunk in enumerate(chunks)))
+        report = DispatchReport(name=name, results=list(results))
+        logging.info(f"{name}: {len(report.succeeded)} of {len(items)} items sent in {len(chunks)} chunks, {len(report.failed)} chunks failed")
+        return report
+
+dispatcher = BatchDispatcher()
@@ -0,0 +1,80 @@
+from utils.http_logging import on_request, on_response, on_error
+import httpx
+import os
+import logging
+
+HTTP2 = os.getenv("HTTP2") == "True"
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 30))
+
+ENDPOINT_TIMEOUTS = {
+    "getToken": float(os.getenv("HTTP_TIMEOUT_GET_TOKEN", 15)),
+    "refreshToken": float(os.getenv("HTTP_TIMEOUT_REFRESH_TOKEN", 15)),
+    "user/add": float(os.getenv("HTTP_TIMEOUT_USER_ADD", 60)),
+    "user/update": float(os.getenv("HTTP_TIMEOUT_USER_UPDATE", 60)),
+    "user/close": float(os.getenv("HTTP_TIMEOUT_USER_CLOSE", 30)),
+    "user/list": float(os.getenv("HTTP_TIMEOUT_USER_LIST", 30)),
+}
+
+class HttpClient:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, "initialized"):
+            self.initialized = True
+            self.client = None
+
+    async def start(self):
+        if self.client is not None:
+            return
+        self.client = httpx.AsyncClient(
+            http2=HTTP2,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(HTTP_DEFAULT_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            event_hooks={"request": [on_request], "response": [on_response]},
+        )
+        logging.info(f"HTTP client started (http2={HTTP2}, max_connections={HTTP_MAX_CONNECTIONS})")
+
+    async def close(self):
+        if self.client is None:
+            return
+        await self.client.aclose()
+        self.client = None
+        logging.info("HTTP client closed")
+
+    def timeout(self, endpoint):
+        return httpx.Timeout(ENDPOINT_TIMEOUTS.get(endpoint, HTTP_DEFAULT_TIMEOUT), connect=HTTP_CONNECT_TIMEOUT)
+
+    async def request(self, endpoint, method, url, stream=False, **kwargs):
+        if self.client is None:
+            await self.start()
+        kwargs.setdefault("timeout", self.timeout(endpoint))
+        request = self.client.build_request(method, url, **kwargs)
+        request.extensions["endpoint"] = endpoint
+        if stream:
+            request.extensions["log_body"] = False
+        try:
+            return await self.client.send(request, stream=stream)
+        except httpx.HTTPError as e:
+            on_error(request, e)
+            raise
+
+    async def get(self, endpoint, url, **kwargs):
+        return await self.request(endpoint, "GET", url, **kwargs)
+
+    async def post(self, endpoint, url, **kwargs):
+        return await self.request(endpoint, "POST", url, **kwargs)
+
+http_client = HttpClient()
@@ -0,0 +1,79 @@
+from utils.logger import ModuleLogger
+from utils.logging_config import LazyJson, mask_field
+from utils.metrics import UPSTREAM_LATENCY, UPSTREAM_ERRORS
+import logging
+import random
+import time
+import json
+import os
+
+HTTP_LOG_BODY_SAMPLE_RATE = float(os.getenv("HTTP_LOG_BODY_SAMPLE_RATE", 0.01))
+HTTP_LOG_BODY_MAX_CHARS = int(os.getenv("HTTP_LOG_BODY_MAX_CHARS", 4000))
+
+logger = ModuleLogger("http").get_logger()
+
+class LazyBody:
+    __slots__ = ("content",)
+
+    def __init__(self, content):
+        self.content = content
+
+    def __str__(self):
+        if not self.content:
+            return ""
+        try:
+            return str(LazyJson(json.loads(self.content), max_chars=HTTP_LOG_BODY_MAX_CHARS))
+        except ValueError:
+            text = self.content.decode("utf-8", errors="replace")
+            if len(text) > HTTP_LOG_BODY_MAX_CHARS:
+                return f"{text[:HTTP_LOG_BODY_MAX_CHARS]}... ({len(text)} chars total)"
+            return text
+
+class LazyUrl:
+    __slots__ = ("url",)
+
+    def __init__(self, url):
+        self.url = url
+
+    def __str__(self):
+        params = [(key, mask_field(key, value)) for key, value in self.url.params.multi_items()]
+        return str(self.url.copy_with(params=params) if params else self.url)
+
+def request_size(request):
+    try:
+        return len(request.content)
+    except Exception:
+        return request.headers.get("content-length", "?")
+
+async def on_request(request):
+    request.extensions["started_at"] = time.perf_counter()
+
+async def on_response(response):
+    request = response.request
+    started_at = request.extensions.get("started_at")
+    elapsed = (time.perf_counter() - started_at) * 1000 if started_at else 0.0
+    response.extensions["elapsed_ms"] = elapsed
+    UPSTREAM_LATENCY.labels(request.extensions.get("endpoint", "other"), str(response.status_code)).observe(elapsed / 1000)
+
+    failed = response.status_code >= 400
+    level = logging.WARNING if failed else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+
+    response_size = response.headers.get("content-length", "?")
+    log_body = request.extensions.get("log_body", True) and (failed or random.random() < HTTP_LOG_BODY_SAMPLE_RATE)
+    if not log_body:
+        logger.log(level, "%s %s -> %s in %.1f ms, request %s bytes, response %s bytes",
+                   request.method, LazyUrl(request.url), response.status_code, elapsed, request_size(request), response_size)
+        return
+
+    await response.aread()
+    logger.log(level, "%s %s -> %s in %.1f ms, request %s bytes, response %s bytes\nRequest body: %s\nResponse body: %s",
+               request.method, LazyUrl(request.url), response.status_code, elapsed, request_size(request),
+               len(response.content), LazyBody(request.content), LazyBody(response.content))
+
+def on_error(request, error):
+    started_at = request.extensions.get("started_at")
+    elapsed = (time.perf_counter() - started_at) * 1000 if started_at else 0.0
+    UPSTREAM_ERRORS.labels(request.extensions.get("endpoint", "other")).inc()
+    logger.error("%s %s failed after %.1f ms: %r", request.method, LazyUrl(request.url), elapsed, error)
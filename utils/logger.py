@@ -1,22 +1,127 @@
 import logging
+import logging.handlers
+import atexit
+import queue
+import glob
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+
+LOG_DIR = os.getenv("LOG_DIR", "./logs")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 50 * 1024 * 1024))
+LOG_BACKUP_DAYS = int(os.getenv("LOG_BACKUP_DAYS", 30))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+class DailyFileHandler(logging.handlers.BaseRotatingHandler):
+    def __init__(self, log_dir, module_name, max_bytes=LOG_MAX_BYTES, backup_days=LOG_BACKUP_DAYS):
+        self.log_dir = log_dir
+        self.module_name = module_name
+        self.max_bytes = max_bytes
+        self.backup_days = backup_days
+        self.day = self._today()
+        self.part = 0
+        super().__init__(self._filename(), "a", encoding="utf-8", delay=True)
+
+    def _today(self):
+        return datetime.now().strftime("%Y-%m-%d")
+
+    def _filename(self):
+        suffix = f".{self.part}" if self.part else ""
+        return os.path.abspath(os.path.join(self.log_dir, f"{self.module_name}_{self.day}{suffix}.log"))
+
+    def shouldRollover(self, record):
+        if self._today() != self.day:
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        today = self._today()
+        if today != self.day:
+            self.day = today
+            self.part = 0
+            self._remove_old_files()
+        else:
+            self.part += 1
+        self.baseFilename = self._filename()
+
+    def _remove_old_files(self):
+        if self.backup_days <= 0:
+            return
+        cutoff = (datetime.now() - timedelta(days=self.backup_days)).strftime("%Y-%m-%d")
+        prefix = f"{self.module_name}_"
+        for path in glob.glob(os.path.join(self.log_dir, f"{prefix}*.log")):
+            day = os.path.basename(path)[len(prefix):len(prefix) + 10]
+            if day < cutoff:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    # Leave message formatting to the listener thread instead of the caller.
+    def prepare(self, record):
+        return record
+
+    # A full queue must not push a traceback to stderr from the caller (usually the event loop).
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class BlockingSentinelListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
 
 class ModuleLogger:
+    _listeners = {}
+    _handlers = {}
+
     def __init__(self, module_name):
         self.logger = logging.getLogger(module_name)
-        self.logger.setLevel(logging.DEBUG)
-        log_dir = "./logs"
+        level_name = os.getenv(f"LOG_LEVEL_{module_name.upper().replace('.', '_')}", LOG_LEVEL)
+        self.logger.setLevel(level_name.upper())
+
+        if module_name in ModuleLogger._listeners:
+            return
 
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
+        if not os.path.exists(LOG_DIR):
+            os.makedirs(LOG_DIR)
 
-        log_filename = datetime.now().strftime(f"{log_dir}/{module_name}_%Y-%m-%d.log")
-        file_handler = logging.FileHandler(log_filename)
-        file_handler.setLevel(logging.DEBUG)
+        file_handler = DailyFileHandler(LOG_DIR, module_name)
         formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        listener = BlockingSentinelListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        handler = DeferredQueueHandler(log_queue)
+        ModuleLogger._listeners[module_name] = listener
+        ModuleLogger._handlers[module_name] = handler
+        self.logger.addHandler(handler)
 
     def get_logger(self):
         return self.logger
+
+    @classmethod
+    def dropped(cls):
+        return {name: handler.dropped for name, handler in cls._handlers.items()}
+
+    @classmethod
+    def stop_all(cls):
+        for listener in cls._listeners.values():
+            listener.stop()
+        cls._listeners.clear()
+
+atexit.register(ModuleLogger.stop_all)
@@ -0,0 +1,59 @@
+from utils.logger import ModuleLogger
+import logging
+import json
+import os
+
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", 2000))
+MASKED_FIELDS = {
+    "pan", "cardcode", "card_idn", "acc_num", "pinfl", "serial_number", "tel", "phone", "additional_phone",
+    "bank_manager_phone", "inn", "password", "access_token", "refresh_token", "authorization",
+}
+SECRET_FIELDS = {"password", "access_token", "refresh_token", "authorization"}
+
+def setup_logger(name):
+    return ModuleLogger(name).get_logger()
+
+def parse_levels(spec):
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+def mask_value(value):
+    if value is None:
+        return None
+    text = str(value)
+    if len(text) <= 8:
+        return "*" * len(text)
+    return text[:4] + "*" * (len(text) - 8) + text[-4:]
+
+def mask_field(key, value):
+    key = str(key).lower()
+    if key in SECRET_FIELDS:
+        return "***"
+    if key in MASKED_FIELDS and not isinstance(value, (dict, list)):
+        return mask_value(value)
+    return mask_payload(value)
+
+def mask_payload(data):
+    if isinstance(data, dict):
+        return {key: mask_field(key, value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [mask_payload(item) for item in data]
+    return data
+
+class LazyJson:
+    __slots__ = ("data", "max_chars", "cls")
+
+    def __init__(self, data, max_chars=LOG_PAYLOAD_MAX_CHARS, cls=None):
+        self.data = data
+        self.max_chars = max_chars
+        self.cls = cls
+
+    def __str__(self):
+        text = json.dumps(mask_payload(self.data), ensure_ascii=False, sort_keys=True, cls=self.cls, default=str)
+        if self.max_chars and len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}... ({len(text)} chars total)"
+        return text
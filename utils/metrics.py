@@ -0,0 +1,87 @@
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+import sys
+
+UPSTREAM_LATENCY = Histogram(
+    "infocus_upstream_request_seconds", "Latency of Infocus API calls",
+    ["endpoint", "status"],
+)
+UPSTREAM_ERRORS = Counter(
+    "infocus_upstream_errors_total", "Infocus API calls that failed without a response",
+    ["endpoint"],
+)
+MYSQL_POOL_ACQUIRE = Histogram(
+    "mysql_pool_acquire_seconds", "Time spent waiting for a MySQL pool connection",
+    ["pool"], buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+ORACLE_LOOKUP_LATENCY = Histogram(
+    "oracle_lookup_seconds", "Latency of Oracle lookups that reach the database",
+    ["method"],
+)
+SYNC_CUSTOMERS = Counter(
+    "customers_sync_total", "Customers processed by the feed sync",
+    ["result"],
+)
+
+class RuntimeCollector:
+    def describe(self):
+        return []
+
+    def collect(self):
+        from database.mysql import database
+
+        in_use = GaugeMetricFamily("mysql_pool_connections_in_use", "MySQL connections checked out", labels=["pool"])
+        size = GaugeMetricFamily("mysql_pool_connections", "MySQL connections open", labels=["pool"])
+        maxsize = GaugeMetricFamily("mysql_pool_connections_max", "MySQL pool size limit", labels=["pool"])
+        for name, pool in database.pools().items():
+            in_use.add_metric([name], pool.size - pool.freesize)
+            size.add_metric([name], pool.size)
+            maxsize.add_metric([name], pool.maxsize)
+        yield in_use
+        yield size
+        yield maxsize
+
+        from database.tunnels import tunnel_manager
+        tunnels = tunnel_manager.stats()
+        if tunnels:
+            up = GaugeMetricFamily("ssh_tunnel_up", "SSH tunnel state", labels=["remote"])
+            latency = GaugeMetricFamily("ssh_tunnel_latency_ms", "Last measured SSH tunnel round trip", labels=["remote"])
+            restarts = CounterMetricFamily("ssh_tunnel_restarts", "SSH tunnel reconnects", labels=["remote"])
+            for tunnel in tunnels:
+                up.add_metric([tunnel["remote"]], int(tunnel["up"]))
+                if tunnel["latency_ms"] is not None:
+                    latency.add_metric([tunnel["remote"]], tunnel["latency_ms"])
+                restarts.add_metric([tunnel["remote"]], tunnel["restarts"])
+            yield up
+            yield latency
+            yield restarts
+
+        from database.tracing import tracer
+        if tracer.enabled:
+            queries = CounterMetricFamily("mysql_traced_queries", "Sampled MySQL statements", labels=["pool", "statement"])
+            seconds = CounterMetricFamily("mysql_traced_query_seconds", "Time spent in sampled MySQL statements", labels=["pool", "statement"])
+            for stats in tracer.snapshot():
+                queries.add_metric([stats["pool"], stats["statement"]], stats["count"])
+                seconds.add_metric([stats["pool"], stats["statement"]], stats["total_time"])
+            yield queries
+            yield seconds
+
+        from utils.logger import ModuleLogger
+        dropped = CounterMetricFamily("log_records_dropped", "Log records dropped because the module queue was full", labels=["module"])
+        for module, count in ModuleLogger.dropped().items():
+            dropped.add_metric([module], count)
+        yield dropped
+
+        cli_info = sys.modules.get("data.cli_info")
+        client = cli_info.OracleClient._instance if cli_info else None
+        if client is not None:
+            stats = client.lookup_cache.stats()
+            lookups = CounterMetricFamily("oracle_lookup_cache", "Oracle lookup cache results", labels=["result"])
+            for result in ("hits", "negative_hits", "misses", "evictions"):
+                lookups.add_metric([result], stats[result])
+            yield lookups
+            cache_size = GaugeMetricFamily("oracle_lookup_cache_size", "Oracle lookup cache entries")
+            cache_size.add_metric([], stats["size"])
+            yield cache_size
+
+REGISTRY.register(RuntimeCollector())
@@ -0,0 +1,67 @@
+from database.mysql import database, MYSQL_BULK_CHUNK_SIZE
+from utils.utils import chunked
+from typing import List, Dict, Optional
+import json
+import logging
+import os
+
+USE_LOCAL_MIRROR = os.getenv("USE_LOCAL_MIRROR") == "True"
+MIRROR_MAX_AGE_SECONDS = int(os.getenv("MIRROR_MAX_AGE_SECONDS", 3600))
+
+async def mirror_lookup(phone: Optional[str] = None, id: Optional[str] = None) -> Optional[List[Dict]]:
+    conditions, params = [], []
+    if phone is not None:
+        conditions.append("phone = %s")
+        params.append(phone)
+    if id is not None:
+        conditions.append("upstream_id = %s")
+        params.append(id)
+    if not conditions:
+        return None
+    query = f"""
+    SELECT payload FROM customer_mirror
+    WHERE {' AND '.join(conditions)} AND synced_at >= NOW() - INTERVAL %s SECOND
+    """
+    params.append(MIRROR_MAX_AGE_SECONDS)
+    rows = await database.fetch_all(query, params=tuple(params), as_dict=True)
+    if not rows:
+        return None
+    return [json.loads(row['payload']) for row in rows]
+
+async def mirror_store(records: List[Dict]):
+    rows = [
+        (record['phone'], str(record['id']) if record.get('id') is not None else None, record.get('clid'),
+         json.dumps(record, ensure_ascii=False))
+        for record in records if record.get('phone')
+    ]
+    if not rows:
+        return
+    query = """
+    INSERT INTO customer_mirror (phone, upstream_id, clid, payload, synced_at)
+    VALUES (%s, %s, %s, %s, NOW())
+    ON DUPLICATE KEY UPDATE upstream_id = VALUES(upstream_id), clid = VALUES(clid),
+                            payload = VALUES(payload), synced_at = VALUES(synced_at)
+    """
+    await database.execute_many(query, rows)
+
+async def mirror_delete(phones: List[str] = (), ids: List[str] = ()):
+    for column, values in (("phone", list(phones)), ("upstream_id", [str(id) for id in ids])):
+        for batch in chunked(values, MYSQL_BULK_CHUNK_SIZE):
+            placeholders = ", ".join(["%s"] * len(batch))
+            await database.execute_query(f"DELETE FROM customer_mirror WHERE {column} IN ({placeholders})", params=tuple(batch))
+
+async def phone_by_clid(clid: str) -> Optional[str]:
+    query = "SELECT phone FROM customers WHERE clid = %s LIMIT 1"
+    result = await database.fetch_one(query, params=(clid,), as_dict=True, use_replica=True)
+    return result['phone'] if result else None
+
+async def write_through(action: str, customers: List):
+    if not USE_LOCAL_MIRROR or not customers:
+        return
+    try:
+        if action == "close":
+            await mirror_delete(ids=[customer.id for customer in customers])
+        else:
+            await mirror_delete(phones=[customer.phone for customer in customers])
+    except Exception as e:
+        logging.error(f"Failed to apply {action} to customer mirror: {e}")
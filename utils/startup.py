@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+import os
+
+READY_STAGES = ("http", "database", "token")
+STARTUP_RETRY_DELAY = float(os.getenv("STARTUP_RETRY_DELAY", 5))
+STARTUP_RETRY_MAX_DELAY = float(os.getenv("STARTUP_RETRY_MAX_DELAY", 300))
+
+class StartupTracker:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, "initialized"):
+            self.initialized = True
+            self.started_at = time.time()
+            self.stages = {}
+            self.tasks = set()
+            self.recover_hooks = {}
+
+    async def run(self, name, coro):
+        stage = {"status": "running", "started_at": time.time(), "duration_ms": None, "error": None}
+        self.stages[name] = stage
+        started = time.perf_counter()
+        try:
+            await coro
+        except asyncio.CancelledError:
+            stage["status"] = "cancelled"
+            raise
+        except Exception as e:
+            stage["status"] = "failed"
+            stage["error"] = repr(e)
+            logging.error(f"Startup stage {name} failed: {e}")
+            return False
+        finally:
+            stage["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        stage["status"] = "done"
+        logging.info(f"Startup stage {name} done in {stage['duration_ms']} ms")
+        return True
+
+    def track(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def background(self, name, coro):
+        return self.track(self.run(name, coro))
+
+    def retry(self, name, factory, then=None):
+        async def loop():
+            delay = STARTUP_RETRY_DELAY
+            while not await self.run(name, factory()):
+                logging.info(f"Retrying startup stage {name} in {delay:.0f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, STARTUP_RETRY_MAX_DELAY)
+            if then is not None:
+                await then()
+        return self.track(loop())
+
+    def on_recover(self, name, then):
+        self.recover_hooks[name] = then
+
+    def mark_done(self, name):
+        stage = self.stages.get(name)
+        if stage is not None and stage["status"] in ("failed", "pending"):
+            stage["status"] = "done"
+            stage["error"] = None
+            logging.info(f"Startup stage {name} recovered")
+            then = self.recover_hooks.get(name)
+            if then is not None:
+                self.track(then())
+
+    async def cancel_background(self):
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def done(self, name):
+        return self.stages.get(name, {}).get("status") == "done"
+
+    def ready(self):
+        return all(self.done(name) for name in READY_STAGES)
+
+    def report(self):
+        return {
+            "ready": self.ready(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "stages": self.stages,
+        }
+
+startup_tracker = StartupTracker()
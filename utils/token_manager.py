@@ -0,0 +1,110 @@
+from utils.http_client import http_client
+from utils.startup import startup_tracker
+import asyncio
+import logging
+import time
+import os
+
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", 300))
+
+class TokenManager:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, "initialized"):
+            self.initialized = True
+            self.token = None
+            self.access_token = None
+            self.refresh_token = None
+            self.expires_at = None
+            self.refresh_expires_at = None
+            self._lock = asyncio.Lock()
+
+    def store(self, token):
+        now = time.monotonic()
+        self.token = token
+        self.access_token = token.access_token
+        self.refresh_token = token.refresh_token
+        self.expires_at = now + int(token.expires_in)
+        self.refresh_expires_at = now + int(token.refresh_expires_in)
+        startup_tracker.mark_done("token")
+
+    def needs_refresh(self):
+        if self.access_token is None:
+            return True
+        if self.expires_at is None:
+            return False
+        return time.monotonic() >= self.expires_at - TOKEN_REFRESH_MARGIN
+
+    def can_refresh(self):
+        if self.refresh_token is None:
+            return False
+        if self.refresh_expires_at is None:
+            return True
+        return time.monotonic() < self.refresh_expires_at - TOKEN_REFRESH_MARGIN
+
+    async def get_access_token(self):
+        if self.needs_refresh():
+            await self.refresh()
+        return self.access_token
+
+    async def refresh(self, stale_token=None):
+        from routers import auth_controller
+        from utils.utils import get_token_from_db
+
+        async with self._lock:
+            if stale_token is not None:
+                if self.access_token != stale_token:
+                    return
+            elif not self.needs_refresh():
+                return
+
+            if self.access_token is None and stale_token is None:
+                row = await get_token_from_db()
+                if row and row['access_token']:
+                    # Issue time is not persisted, so a token loaded from the DB is used until it gets a 401.
+                    self.access_token = row['access_token']
+                    self.refresh_token = row['refresh_token']
+                    startup_tracker.mark_done("token")
+                    return
+
+            token = None
+            if self.can_refresh():
+                try:
+                    token = await auth_controller.renew_token(self.refresh_token)
+                except Exception as e:
+                    logging.warning(f"Error refreshing token, requesting a new one: {e}")
+            if token is None:
+                token = await auth_controller.fetch_token()
+            await self.persist(token)
+
+    async def persist(self, token):
+        from routers import auth_controller
+
+        try:
+            await auth_controller.persist_token(token)
+        except Exception as e:
+            logging.error(f"Error saving refreshed token: {e}")
+
+    def headers(self, access_token):
+        return {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json"
+        } if access_token else {}
+
+token_manager = TokenManager()
+
+async def authorized_request(endpoint, method, url, **kwargs):
+    access_token = await token_manager.get_access_token()
+    response = await http_client.request(endpoint, method, url, headers=token_manager.headers(access_token), **kwargs)
+    if response.status_code == 401:
+        await response.aclose()
+        await token_manager.refresh(stale_token=access_token)
+        access_token = token_manager.access_token
+        response = await http_client.request(endpoint, method, url, headers=token_manager.headers(access_token), **kwargs)
+    return response
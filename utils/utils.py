@@ -1,9 +1,21 @@
 from database.mysql import database
+from database.migrations import migrate, ensure_schema
 from models.api_models import Customer
 from models.db_models import Customer as CustomerDB
-from typing import List, Dict
+from utils.dispatcher import dispatcher, SYNC_CONCURRENCY
+from utils.metrics import SYNC_CUSTOMERS
+from typing import List, Dict, Iterable, Optional, Tuple, AsyncIterator, AsyncIterable
+import asyncio
+import logging
+import hashlib
 import json
+from fastapi.encoders import jsonable_encoder
 import httpx
+import os
+
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", 500))
+SYNC_CHUNK_SIZE = int(os.getenv("SYNC_CHUNK_SIZE", SYNC_BATCH_SIZE * SYNC_CONCURRENCY))
+FEED_READ_SIZE = int(os.getenv("FEED_READ_SIZE", 64 * 1024))
 
 async def save_token_to_db(token):
     query = """
@@ -32,133 +44,163 @@ async def get_token_from_db():
     result = await database.fetch_one(query, params=(1,), as_dict=True)
     return result
 
-async def get_authorization_header():
-    query = "SELECT access_token FROM tokens"
-    result = await database.fetch_one(query, as_dict=True)
-    access_token = result['access_token'] if result else None
-    return {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
-    } if access_token else {}
-
 async def create_table_if_not_exists():
-    query = """
-    CREATE TABLE IF NOT EXISTS tokens (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        login VARCHAR(255) NOT NULL,
-        password VARCHAR(255) NOT NULL,
-        access_token TEXT,
-        refresh_token TEXT,
-        token_type VARCHAR(50),
-        expires_in INT,
-        refresh_expires_in INT
-    );
-
-    CREATE TABLE IF NOT EXISTS customers (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        additional_phone VARCHAR(255) UNIQUE,
-        bank_manager_fio VARCHAR(255),
-        bank_manager_phone VARCHAR(255) UNIQUE,
-        bank_product VARCHAR(255),
-        bin VARCHAR(255),
-        card_type_id INT,
-        clid VARCHAR(255),
-        date_birth DATETIME,
-        date_expiry DATETIME,
-        email VARCHAR(255) UNIQUE,
-        firstname VARCHAR(255),
-        inn VARCHAR(255),
-        language VARCHAR(255),
-        lastname VARCHAR(255),
-        manager BOOLEAN,
-        manual_subscribe BOOLEAN,
-        message_id VARCHAR(255),
-        middlename VARCHAR(255),
-        pan VARCHAR(255),
-        phone VARCHAR(255) UNIQUE,
-        project_additional_data JSON,
-        service_level VARCHAR(255),
-        welcome VARCHAR(255)
-    );
-    """
-    await database.execute_query(query)
+    await migrate()
 
-async def load_customers_from_file(file_path: str) -> List[Customer]:
+async def iter_json_records(file_path: str) -> AsyncIterator[Dict]:
     with open(file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-    return [Customer(**item) for item in data]
+        head = await asyncio.to_thread(file.read, FEED_READ_SIZE)
+        file.seek(0)
+        if not head.lstrip().startswith("["):
+            while True:
+                lines = await asyncio.to_thread(file.readlines, FEED_READ_SIZE)
+                if not lines:
+                    return
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
 
-async def get_customer_from_db(phone: str):
-    query = "SELECT * FROM customers WHERE phone = %s"
-    result = await database.fetch_all(query, params=(phone,), as_dict=True)
-    return result
+        decoder = json.JSONDecoder()
+        buffer, pos, eof, started = "", 0, False, False
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+                pos += 1
+            if pos < len(buffer):
+                if not started:
+                    if buffer[pos] != "[":
+                        raise ValueError(f"Expected a JSON array in {file_path}")
+                    started = True
+                    pos += 1
+                    continue
+                if buffer[pos] == "]":
+                    return
+                try:
+                    item, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    yield item
+                    continue
+            if eof:
+                raise ValueError(f"Unexpected end of JSON array in {file_path}")
+            block = await asyncio.to_thread(file.read, FEED_READ_SIZE)
+            eof = not block
+            buffer = buffer[pos:] + block
+            pos = 0
 
-def customer_to_dict(customer: Customer) -> Dict:
-    return {
-        "additional_phone": customer.additional_phone,
-        "bank_manager_fio": customer.bank_manager_fio,
-        "bank_manager_phone": customer.bank_manager_phone,
-        "bank_product": customer.bank_product,
-        "bin": customer.bin,
-        "card_type_id": customer.card_type_id,
-        "clid": customer.clid,
-        "date_birth": customer.date_birth.isoformat() if customer.date_birth else None,
-        "date_expiry": customer.date_expiry.isoformat() if customer.date_birth else None,
-        "email": customer.email,
-        "firstname": customer.firstname,
-        "inn": customer.inn,
-        "language": customer.language,
-        "lastname": customer.lastname,
-        "manager": customer.manager,
-        "manualSubscribe": customer.manualSubscribe,
-        "messageId": customer.messageId,
-        "middlename": customer.middlename,
-        "pan": customer.pan,
-        "phone": customer.phone,
-        "project_additional_data": customer.project_additional_data,
-        "service_level": customer.service_level,
-        "welcome": customer.welcome
-    }
+async def iter_customers_from_file(file_path: str, chunk_size: int = SYNC_CHUNK_SIZE) -> AsyncIterator[List[Customer]]:
+    chunk = []
+    async for item in iter_json_records(file_path):
+        chunk.append(Customer(**item))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
-async def process_customers(customers: List[Customer]):
-    from routers import customers_controller
+async def get_customer_fingerprints_from_db(phones: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+    if phones is None:
+        rows = await database.fetch_all("SELECT phone, fingerprint FROM customers", as_dict=True)
+    else:
+        rows = []
+        for batch in chunked(phones, SYNC_BATCH_SIZE):
+            placeholders = ", ".join(["%s"] * len(batch))
+            query = f"SELECT phone, fingerprint FROM customers WHERE phone IN ({placeholders})"
+            rows.extend(await database.fetch_all(query, params=tuple(batch), as_dict=True))
+    return {row['phone']: row['fingerprint'] for row in rows}
+
+def chunked(items: List, size: int) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def customer_fingerprint(customer: Customer) -> str:
+    payload = json.dumps(customer.model_dump(mode="json"), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def customer_changed(customer: Customer, fingerprint: Optional[str]) -> bool:
+    return customer_fingerprint(customer) != fingerprint
+
+def diff_customers(customers: List[Customer], existing: Dict[str, Optional[str]]) -> Tuple[List[Customer], List[Customer], List[Customer]]:
+    added, changed, unchanged = [], [], []
     for customer in customers:
-        existing_customer = await get_customer_from_db(customer.phone)
-        if existing_customer:
-            if customer_to_dict(customer) != existing_customer:
-                await customers_controller.update_customers([customer])
-                await update_customer_in_db(customer)
+        if customer.phone not in existing:
+            added.append(customer)
+        elif customer_changed(customer, existing[customer.phone]):
+            changed.append(customer)
         else:
-            await customers_controller.add_customers([customer])
-            await save_customer_to_db(customer)
+            unchanged.append(customer)
+    return added, changed, unchanged
 
-async def save_customer_to_db(customer: CustomerDB):
-    query = """
-    INSERT INTO customers (additional_phone, bank_manager_fio, bank_manager_phone, bank_product, bin, card_type_id,
-                           clid, date_birth, date_expiry, email, firstname, inn, language, lastname, manager,
-                           manual_subscribe, message_id, middlename, pan, phone, project_additional_data, service_level,
-                           welcome)
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    params = (customer.additional_phone, customer.bank_manager_fio, customer.bank_manager_phone, customer.bank_product,
-              customer.bin, customer.card_type_id, customer.clid, customer.date_birth, customer.date_expiry, customer.email,
-              customer.firstname, customer.inn, customer.language, customer.lastname, customer.manager, customer.manualSubscribe,
-              customer.messageId, customer.middlename, customer.pan, customer.phone, json.dumps(customer.project_additional_data),
-              customer.service_level, customer.welcome)
-    await database.execute_query(query, params)
+async def sync_chunk(customers: List[Customer], existing: Dict[str, Optional[str]], batch_size: int = SYNC_BATCH_SIZE) -> Dict[str, int]:
+    from routers import customers_controller
+    added, changed, unchanged = diff_customers(customers, existing)
 
-async def update_customer_in_db(customer: CustomerDB):
-    query = """
-    UPDATE customers SET additional_phone = %s, bank_manager_fio = %s, bank_manager_phone = %s, bank_product = %s,
-                         bin = %s, card_type_id = %s, clid = %s, date_birth = %s, date_expiry = %s, email = %s,
-                         firstname = %s, inn = %s, language = %s, lastname = %s, manager = %s, manual_subscribe = %s,
-                         message_id = %s, middlename = %s, pan = %s, phone = %s, project_additional_data = %s,
-                         service_level = %s, welcome = %s
-    WHERE phone = %s
+    added_report, changed_report = await asyncio.gather(
+        dispatcher.dispatch("user/add", customers_controller.add_customers, added, batch_size),
+        dispatcher.dispatch("user/update", customers_controller.update_customers, changed, batch_size),
+    )
+
+    succeeded = added_report.succeeded + changed_report.succeeded
+    await upsert_customers_to_db(succeeded)
+    for customer in succeeded:
+        existing[customer.phone] = customer_fingerprint(customer)
+
+    return {
+        "added": len(added_report.succeeded),
+        "updated": len(changed_report.succeeded),
+        "unchanged": len(unchanged),
+        "failed": len(added) + len(changed) - len(succeeded),
+    }
+
+async def sync_customers(chunks: AsyncIterable[List[Customer]], batch_size: int = SYNC_BATCH_SIZE,
+                         start_chunk: int = 0, on_chunk=None) -> Dict[str, int]:
+    existing = await get_customer_fingerprints_from_db()
+    totals = {"added": 0, "updated": 0, "unchanged": 0, "failed": 0}
+    index = -1
+    async for chunk in chunks:
+        index += 1
+        if index < start_chunk:
+            continue
+        result = await sync_chunk(chunk, existing, batch_size)
+        for key, value in result.items():
+            totals[key] += value
+            SYNC_CUSTOMERS.labels(key).inc(value)
+        if on_chunk:
+            await on_chunk(index, result)
+    logging.info(f"Customers sync: {totals['added']} added, {totals['updated']} updated, "
+                 f"{totals['unchanged']} unchanged, {totals['failed']} failed")
+    return totals
+
+async def process_customers(customers: List[Customer], batch_size: int = SYNC_BATCH_SIZE):
+    async def chunks():
+        for chunk in chunked(customers, SYNC_CHUNK_SIZE):
+            yield chunk
+    return await sync_customers(chunks(), batch_size)
+
+CUSTOMER_COLUMNS = (
+    "additional_phone", "bank_manager_fio", "bank_manager_phone", "bank_product", "bin", "card_type_id",
+    "clid", "date_birth", "date_expiry", "email", "firstname", "inn", "language", "lastname", "manager",
+    "manual_subscribe", "message_id", "middlename", "pan", "phone", "project_additional_data", "service_level",
+    "welcome", "fingerprint",
+)
+
+def customer_params(customer: CustomerDB) -> Tuple:
+    return (customer.additional_phone, customer.bank_manager_fio, customer.bank_manager_phone, customer.bank_product,
+            customer.bin, customer.card_type_id, customer.clid, customer.date_birth, customer.date_expiry, customer.email,
+            customer.firstname, customer.inn, customer.language, customer.lastname, customer.manager, customer.manualSubscribe,
+            customer.messageId, customer.middlename, customer.pan, customer.phone,
+            json.dumps(jsonable_encoder(customer.project_additional_data)),
+            customer.service_level, customer.welcome, customer_fingerprint(customer))
+
+async def upsert_customers_to_db(customers: List[CustomerDB]) -> int:
+    if not customers:
+        return 0
+    # ON DUPLICATE KEY must only ever match the phone key, so the sparse UNIQUE indexes have to be gone first.
+    await ensure_schema()
+    query = f"""
+    INSERT INTO customers ({", ".join(CUSTOMER_COLUMNS)})
+    VALUES ({", ".join(["%s"] * len(CUSTOMER_COLUMNS))})
+    ON DUPLICATE KEY UPDATE {", ".join(f"{column} = VALUES({column})" for column in CUSTOMER_COLUMNS if column != "phone")}
     """
-    params = (customer.additional_phone, customer.bank_manager_fio, customer.bank_manager_phone, customer.bank_product,
-              customer.bin, customer.card_type_id, customer.clid, customer.date_birth, customer.date_expiry, customer.email,
-              customer.firstname, customer.inn, customer.language, customer.lastname, customer.manager, customer.manualSubscribe,
-              customer.messageId, customer.middlename, customer.pan, customer.phone, json.dumps(customer.project_additional_data),
-              customer.service_level, customer.welcome, customer.phone)
-    await database.execute_query(query, params)
+    return await database.execute_many(query, [customer_params(customer) for customer in customers])